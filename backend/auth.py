@@ -1,10 +1,15 @@
+import hashlib
+import hmac
+import secrets
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .database import get_db, User
 
 # Use argon2 for password hashing
@@ -17,6 +22,21 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Plain snapshot of the authenticated user, safe to share across requests."""
+    id: int
+    email: str
+    full_name: str
+
+# Short-lived caches so hot endpoints skip JWT decoding and the user lookup
+_token_cache = TTLCache(maxsize=10000, ttl=30)  # token hash -> user id
+_user_cache = TTLCache(maxsize=5000, ttl=60)  # user id -> CurrentUser
+
+# Successful password checks, keyed by an HMAC so raw passwords are never stored
+_password_cache_secret = secrets.token_bytes(32)
+_password_cache = TTLCache(maxsize=4096, ttl=300)
+
 async def get_token_from_header(authorization: Optional[str] = Header(None)) -> Optional[str]:
     """Extract token from Authorization header."""
     if not authorization:
@@ -28,7 +48,18 @@ async def get_token_from_header(authorization: Optional[str] = Header(None)) ->
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    key = hmac.new(
+        _password_cache_secret,
+        plain_password.encode() + b"\x00" + hashed_password.encode(),
+        hashlib.sha256,
+    ).digest()
+    if key in _password_cache:
+        return True
+    verified = pwd_context.verify(plain_password, hashed_password)
+    # Only cache successes so the cache cannot act as an oracle for failures
+    if verified:
+        _password_cache[key] = True
+    return verified
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
@@ -45,10 +76,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
+async def get_current_user(
     token: Optional[str] = Depends(get_token_from_header),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
     """Get the current authenticated user from JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,19 +90,33 @@ def get_current_user(
     if not token:
         raise credentials_exception
     
+    key = hashlib.sha256(token.encode()).digest()[:16]
+    user_id = _token_cache.get(key)
+    if user_id is not None:
+        user = _user_cache.get(user_id)
+        if user is not None:
+            return user
+    else:
+        user_id = _decode_user_id(token, credentials_exception)
+    
+    db_user = await db.get(User, user_id)
+    if db_user is None:
+        raise credentials_exception
+    user = CurrentUser(id=db_user.id, email=db_user.email, full_name=db_user.full_name)
+    _token_cache[key] = user_id
+    _user_cache[user_id] = user
+    return user
+
+def _decode_user_id(token: str, credentials_exception: HTTPException) -> int:
+    """Decode a JWT and return the user id stored in its subject."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id_str = payload.get("sub")
         if user_id_str is None:
             raise credentials_exception
         # Convert string back to integer
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (JWTError, ValueError, TypeError) as e:
         print(f"JWT Error: {e}")  # Debug logging
         raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
 
@@ -6,6 +6,10 @@ load_dotenv()
 
 class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
+    # Origins allowed to call the API; defaults to the local frontend on any port
+    CORS_ORIGIN_REGEX: str = os.getenv(
+        "CORS_ORIGIN_REGEX", r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$"
+    )
     
     # Validation to ensure the app doesn't start without critical keys
     def validate(self):
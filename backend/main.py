@@ -1,10 +1,13 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from typing import Annotated, List, Optional
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import delete, exists, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
 
 from .models import (
     ContractAnalysisResponse, ChatRequest, ChatResponse,
@@ -16,14 +19,14 @@ from .config import settings
 from .database import get_db, init_db, User, ChatSession, ChatMessage, ContractAnalysis
 from .auth import (
     verify_password, get_password_hash, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    get_current_user, CurrentUser, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
-app = FastAPI(title="LexAI API")
+app = FastAPI(title="LexAI API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origin_regex=settings.CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -36,7 +39,7 @@ async def startup_event():
     except ValueError as e:
         print(f"Warning: {e}")
     # Initialize database
-    init_db()
+    await init_db()
 
 @app.get("/")
 def read_root():
@@ -44,11 +47,11 @@ def read_root():
 
 # --- Authentication Endpoints ---
 @app.post("/signup", response_model=Token)
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
+async def signup(user_data: UserSignup, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    result = await db.execute(select(exists().where(User.email == user_data.email)))
+    if result.scalar():
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
@@ -59,8 +62,13 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
         full_name=user_data.full_name
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another signup with the same email won the race since the check above
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await db.refresh(new_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -77,9 +85,10 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
     }
 
 @app.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login and get access token."""
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalar_one_or_none()
     if not user or not verify_password(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=401,
@@ -101,7 +110,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     }
 
 @app.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     """Get current user information."""
     return {
         "id": current_user.id,
@@ -113,8 +122,8 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 @app.post("/chat-sessions", response_model=ChatSessionResponse)
 async def create_chat_session(
     session_data: ChatSessionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new chat session."""
     new_session = ChatSession(
@@ -122,8 +131,8 @@ async def create_chat_session(
         title=session_data.title
     )
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()
+    await db.refresh(new_session)
     
     return {
         "id": new_session.id,
@@ -135,15 +144,22 @@ async def create_chat_session(
 
 @app.get("/chat-sessions", response_model=ChatHistoryResponse)
 async def get_chat_sessions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all chat sessions for the current user."""
-    sessions = db.query(ChatSession).filter(ChatSession.user_id == current_user.id).order_by(ChatSession.updated_at.desc()).all()
+    # Count messages in the same query instead of one COUNT per session
+    result = await db.execute(
+        select(ChatSession, func.count(ChatMessage.id))
+        .outerjoin(ChatMessage, ChatMessage.session_id == ChatSession.id)
+        .where(ChatSession.user_id == current_user.id)
+        .group_by(ChatSession.id)
+        .order_by(ChatSession.updated_at.desc())
+    )
+    rows = result.all()
     
     session_list = []
-    for session in sessions:
-        message_count = db.query(ChatMessage).filter(ChatMessage.session_id == session.id).count()
+    for session, message_count in rows:
         session_list.append({
             "id": session.id,
             "title": session.title,
@@ -157,19 +173,41 @@ async def get_chat_sessions(
 @app.get("/chat-sessions/{session_id}/messages")
 async def get_chat_messages(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all messages for a specific chat session."""
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    """Get a page of messages for a chat session, newest page first.
+    
+    Pass the fields of the returned next_cursor as `before` and `before_id`
+    to fetch older messages.
+    """
+    if (before is None) != (before_id is None):
+        raise HTTPException(status_code=400, detail="before and before_id must be given together")
+    
+    result = await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )
+    session = result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
-    messages = db.query(ChatMessage).filter(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at.asc()).all()
+    # Keyset pagination on (created_at, id); id breaks ties between equal timestamps
+    query = select(ChatMessage).where(ChatMessage.session_id == session_id)
+    if before is not None:
+        query = query.where(tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(before, before_id))
+    query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1)
+    result = await db.execute(query)
+    messages = result.scalars().all()
+    
+    has_more = len(messages) > limit
+    messages = list(reversed(messages[:limit]))
     
     return {
         "session_id": session_id,
@@ -177,26 +215,43 @@ async def get_chat_messages(
         "messages": [
             {"role": msg.role, "content": msg.content, "created_at": msg.created_at.isoformat()}
             for msg in messages
-        ]
+        ],
+        "next_cursor": (
+            {"before": messages[0].created_at.isoformat(), "before_id": messages[0].id}
+            if has_more else None
+        )
     }
 
 @app.delete("/chat-sessions/{session_id}")
 async def delete_chat_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a chat session."""
-    session = db.query(ChatSession).filter(
+    owned_session = select(ChatSession.id).where(
         ChatSession.id == session_id,
         ChatSession.user_id == current_user.id
-    ).first()
+    )
+    # Bulk deletes skip ORM cascades, so remove the messages explicitly first
+    await db.execute(
+        delete(ChatMessage).where(
+            ChatMessage.session_id == session_id,
+            ChatMessage.session_id.in_(owned_session)
+        )
+    )
+    # Ownership check and delete in one statement
+    result = await db.execute(
+        delete(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        ).returning(ChatSession.id)
+    )
     
-    if not session:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
-    db.delete(session)
-    db.commit()
+    await db.commit()
     return {"status": "deleted"}
 
 # --- Chat Endpoint (No auth required) ---
@@ -240,10 +295,8 @@ async def analyze_contract(
         role=role
     )
     
-    # Add contract text to response
-    result_dict = analysis_result.model_dump()
-    result_dict['contract_text'] = contract_text
-    analysis_result = ContractAnalysisResponse(**result_dict)
+    # Add contract text to response without re-validating the result
+    analysis_result = analysis_result.model_copy(update={"contract_text": contract_text})
     
     return analysis_result
 
@@ -262,9 +315,7 @@ async def analyze_contract_text(
         role=role
     )
     
-    # Add contract text to response
-    result_dict = analysis_result.model_dump()
-    result_dict['contract_text'] = text
-    analysis_result = ContractAnalysisResponse(**result_dict)
+    # Add contract text to response without re-validating the result
+    analysis_result = analysis_result.model_copy(update={"contract_text": text})
     
     return analysis_result
@@ -1,16 +1,63 @@
 import google.generativeai as genai
-import json
+from google.api_core.exceptions import GoogleAPIError
+import hashlib
+import orjson
 import re
+import time
+from cachetools import TTLCache
+from functools import lru_cache
 from typing import List, Optional
 from ..config import settings
 from ..models import ContractAnalysisResponse, ChatMessage
 
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 # Configure Gemini
 if settings.GEMINI_API_KEY:
     genai.configure(api_key=settings.GEMINI_API_KEY)
 
-def get_analysis_prompt(text: str, industry: str, risk_tolerance: str, role: str) -> str:
-    return f"""
+@lru_cache(maxsize=4)
+def _get_model(name: str) -> genai.GenerativeModel:
+    """Return a shared GenerativeModel; it holds no per-request state."""
+    return genai.GenerativeModel(name)
+
+# Contract text sent to the model is capped at an *estimated* token budget.
+# There is no local Gemini tokenizer, so ASCII is counted at ~4 characters per
+# token and every other character (CJK, emoji, accents) as a whole token.
+CONTEXT_TOKEN_BUDGET = 8000
+_ASCII_CHARS_PER_TOKEN = 4
+
+def _estimate_tokens(text: str) -> float:
+    """Rough Gemini token count for text, per the ratios above."""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars / _ASCII_CHARS_PER_TOKEN + (len(text) - ascii_chars)
+
+def _truncate_to_estimated_tokens(text: str, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Trim text to about `budget` tokens, as counted by _estimate_tokens."""
+    # No character is estimated above one token
+    if len(text) <= budget:
+        return text
+    # ...nor below a quarter token, so nothing past this prefix can fit
+    head = text[:budget * _ASCII_CHARS_PER_TOKEN]
+    if _estimate_tokens(head) <= budget:
+        cut = len(head)
+    else:
+        # The estimate grows with the prefix length, so bisect for the longest fit
+        lo, hi = budget, len(head)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if _estimate_tokens(head[:mid]) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        cut = lo
+    if cut == len(text):
+        return text
+    print(f"Truncating contract text from {len(text)} to {cut} characters (~{budget} estimated tokens)")
+    return text[:cut]
+
+# Static analysis prompt, built once; doubled braces are literal JSON braces
+_PROMPT_TEMPLATE = """
     You are an expert Legal Risk Analyst acting as a copilot for a client in the '{industry}' industry.
     Their risk tolerance is '{risk_tolerance}'. Their role in this contract is '{role}'.
 
@@ -33,9 +80,13 @@ def get_analysis_prompt(text: str, industry: str, risk_tolerance: str, role: str
     }}
 
     Contract Text:
-    {text[:30000]} 
+    {text} 
     """
 
+def get_analysis_prompt(text: str, industry: str, risk_tolerance: str, role: str) -> str:
+    text = _truncate_to_estimated_tokens(text)
+    return _PROMPT_TEMPLATE.format(industry=industry, risk_tolerance=risk_tolerance, role=role, text=text)
+
 def _extract_text_from_response(response) -> Optional[str]:
     """Try multiple ways to pull text from the Gemini response object."""
     raw_text = getattr(response, "text", None)
@@ -53,53 +104,150 @@ def _extract_text_from_response(response) -> Optional[str]:
     return None
 
 
+def _find_json_object(s: str, start: int = 0) -> Optional[str]:
+    """Return the first balanced {...} at or after start, skipping braces inside strings."""
+    start = s.find("{", start)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+
 def _parse_json_fallback(raw_text: str) -> dict:
-    """Try to parse JSON; if it fails, attempt to extract the first JSON object."""
+    """Try to parse JSON; if it fails, extract the first {...} that parses as JSON."""
     try:
-        return json.loads(raw_text)
-    except Exception:
-        match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        raise
+        return orjson.loads(raw_text)
+    except Exception as e:
+        error = e
+
+    # Prose like "Note {see below}." can precede the real object, so on a
+    # decode failure resume from the next opening brace
+    pos = raw_text.find("{")
+    while pos != -1:
+        candidate = _find_json_object(raw_text, pos)
+        if candidate is None:
+            break
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            pos = raw_text.find("{", pos + 1)
+
+    # Scanner found no balanced object that parses; fall back to the outermost braces
+    match = _JSON_OBJ_RE.search(raw_text)
+    if match:
+        return orjson.loads(match.group(0))
+    raise error
+
+
+# Successful analyses as serialized JSON, keyed by contract hash + client profile
+_analysis_cache = TTLCache(maxsize=512, ttl=3600)
+
+def _analysis_cache_key(text: str, industry: str, risk_tolerance: str, role: str) -> bytes:
+    # Hash the profile as a JSON array so free-form fields can't collide via separators
+    return (
+        hashlib.sha256(text.encode("utf-8", "replace")).digest()
+        + hashlib.sha256(orjson.dumps([industry, risk_tolerance, role])).digest()
+    )
+
+
+# Circuit breaker for the primary model: after repeated failures, go straight
+# to the fallback for a cooldown instead of waiting on flash every request
+FLASH_FAILURE_THRESHOLD = 3
+FLASH_COOLDOWN_SECONDS = 60
+_flash_breaker = {"failures": 0, "open_until": 0.0}
+
+def _record_flash_failure() -> None:
+    _flash_breaker["failures"] += 1
+    # Once tripped, a single failed probe after the cooldown re-opens it
+    if _flash_breaker["failures"] >= FLASH_FAILURE_THRESHOLD:
+        _flash_breaker["open_until"] = time.monotonic() + FLASH_COOLDOWN_SECONDS
+
+def _close_flash_breaker() -> None:
+    _flash_breaker["failures"] = 0
+    _flash_breaker["open_until"] = 0.0
 
 
 async def analyze_contract_with_ai(text: str, industry: str, risk_tolerance: str, role: str) -> ContractAnalysisResponse:
+    cache_key = _analysis_cache_key(text, industry, risk_tolerance, role)
+    cached = _analysis_cache.get(cache_key)
+    if cached is not None:
+        return ContractAnalysisResponse.model_validate_json(cached)
+
     prompt = get_analysis_prompt(text, industry, risk_tolerance, role)
 
-    def _call_model(model_name: str) -> ContractAnalysisResponse:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
+    async def _call_model(model_name: str) -> ContractAnalysisResponse:
+        model = _get_model(model_name)
+        response = await model.generate_content_async(prompt)
 
         raw_text = _extract_text_from_response(response)
         if not raw_text:
             raise ValueError("No response text returned from model.")
 
         result_json = _parse_json_fallback(raw_text)
-        return ContractAnalysisResponse(**result_json)
+        result = ContractAnalysisResponse(**result_json)
+        _analysis_cache[cache_key] = result.model_dump_json()
+        return result
 
-    try:
-        return _call_model("gemini-2.5-flash")
-    except Exception as e:
-        err_msg = str(e)
-        print(f"AI Error (flash): {err_msg}")
+    now = time.monotonic()
+    if now >= _flash_breaker["open_until"]:
+        if _flash_breaker["failures"] >= FLASH_FAILURE_THRESHOLD:
+            # Half-open: hold the breaker open while this request probes flash,
+            # so concurrent requests keep using the fallback
+            _flash_breaker["open_until"] = now + FLASH_COOLDOWN_SECONDS
         try:
-            return _call_model("gemini-1.0-pro")
-        except Exception as e2:
-            err_msg = str(e2)
-            print(f"AI Error (fallback pro): {err_msg}")
-        # Final safe fallback
-        return ContractAnalysisResponse(
-            summary=f"Error analyzing contract: {err_msg[:100]}... Please try again.",
-            overall_risk_score=0,
-            clauses=[]
-        )
+            result = await _call_model("gemini-2.5-flash")
+            _close_flash_breaker()
+            return result
+        except GoogleAPIError as e:
+            # Only API/transport errors suggest an outage; bad output doesn't
+            err_msg = str(e)
+            print(f"AI Error (flash): {err_msg}")
+            _record_flash_failure()
+        except Exception as e:
+            # Flash answered, so the service is up even if the output was unusable
+            err_msg = str(e)
+            print(f"AI Error (flash): {err_msg}")
+            _close_flash_breaker()
+    else:
+        print("AI: flash circuit open, using fallback model")
+
+    try:
+        return await _call_model("gemini-1.0-pro")
+    except Exception as e2:
+        err_msg = str(e2)
+        print(f"AI Error (fallback pro): {err_msg}")
+    # Final safe fallback
+    return ContractAnalysisResponse(
+        summary=f"Error analyzing contract: {err_msg[:100]}... Please try again.",
+        overall_risk_score=0,
+        clauses=[]
+    )
 
 async def chat_with_contract(message: str, history: List[ChatMessage], contract_context: str, user_details: dict = None) -> str:
     """
     Handles follow-up questions about the contract using chat history.
     """
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = _get_model('gemini-2.5-flash')
     
     # Transform Pydantic history models to Gemini format
     gemini_history = []
@@ -132,7 +280,7 @@ async def chat_with_contract(message: str, history: List[ChatMessage], contract_
     
     --- 
     PROVIDED CONTRACT TEXT (if any):
-    {contract_context[:30000]}
+    {_truncate_to_estimated_tokens(contract_context)}
     ---
     """
     gemini_history.append({"role": "user", "parts": [system_context]})
@@ -147,7 +295,7 @@ async def chat_with_contract(message: str, history: List[ChatMessage], contract_
     chat = model.start_chat(history=gemini_history)
     
     try:
-        response = chat.send_message(message)
+        response = await chat.send_message_async(message)
         return getattr(response, "text", None) or str(response)
     except Exception as e:
         return f"Error processing chat: {str(e)}"
\ No newline at end of file
@@ -1,24 +1,58 @@
 from pypdf import PdfReader
-import io
+import shutil
+import tempfile
 from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+def _open_upload(file: UploadFile):
+    """
+    Returns a seekable handle on the upload without reading it into memory.
+    """
+    try:
+        file.file.seek(0)
+        return file.file
+    except (AttributeError, OSError):
+        # Spool non-seekable streams to a temp file, in memory up to 16 MB
+        spooled = tempfile.SpooledTemporaryFile(max_size=16 << 20)
+        shutil.copyfileobj(file.file, spooled, length=1 << 20)
+        spooled.seek(0)
+        return spooled
+
+def _extract_pages(pdf_file) -> str:
+    """
+    Extracts and joins the text of every page. Runs in a worker thread.
+    """
+    reader = PdfReader(pdf_file)
+    pages: list[str] = []
+    
+    # Iterate through pages
+    for page in reader.pages:
+        extracted = page.extract_text()
+        if extracted:
+            pages.append(extracted)
+    
+    # Join once instead of growing the string page by page
+    return "".join(page_text + "\n" for page_text in pages)
+
+def _read_upload_text(file: UploadFile) -> str:
+    """
+    Opens the upload and extracts its text in one worker-thread hop.
+    """
+    pdf_file = _open_upload(file)
+    try:
+        return _extract_pages(pdf_file)
+    finally:
+        # Close our spooled copy; the upload's own handle belongs to Starlette
+        if pdf_file is not file.file:
+            pdf_file.close()
 
 async def extract_text_from_pdf(file: UploadFile) -> str:
     """
     Reads a PDF file upload and returns the raw text content.
     """
     try:
-        # Read file content into memory
-        content = await file.read()
-        pdf_file = io.BytesIO(content)
-        
-        reader = PdfReader(pdf_file)
-        text = ""
-        
-        # Iterate through pages
-        for page in reader.pages:
-            extracted = page.extract_text()
-            if extracted:
-                text += extracted + "\n"
+        # pypdf is pure Python, so keep reading and parsing off the event loop
+        text = await run_in_threadpool(_read_upload_text, file)
                 
         if not text.strip():
             raise ValueError("No text could be extracted. The PDF might be an image scan.")
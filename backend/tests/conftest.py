@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend import auth
+from backend.auth import create_access_token
+from backend.database import Base, User, get_db
+from backend.main import app
+
+
+@pytest.fixture
+def sessionmaker(tmp_path):
+    # NullPool: the TestClient and the seeding helpers run on different event loops
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def run_db(sessionmaker):
+    """Run `fn(db)` against the test database and return its result."""
+    def run(fn):
+        async def wrapper():
+            async with sessionmaker() as db:
+                result = await fn(db)
+                await db.commit()
+                return result
+        return asyncio.run(wrapper())
+    return run
+
+
+@pytest.fixture
+def client(sessionmaker):
+    async def override_get_db():
+        async with sessionmaker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    # User ids repeat across test databases, so start every test with cold caches
+    auth._token_cache.clear()
+    auth._user_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def make_user(run_db):
+    """Create a user and return (user_id, auth headers)."""
+    def make(email):
+        async def create(db):
+            user = User(email=email, password_hash="x", full_name=email)
+            db.add(user)
+            await db.flush()
+            return user.id
+        user_id = run_db(create)
+        token = create_access_token(data={"sub": str(user_id)})
+        return user_id, {"Authorization": f"Bearer {token}"}
+    return make
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+
+from backend.services import ai_engine
+
+VALID_ANALYSIS = orjson.dumps({"summary": "ok", "overall_risk_score": 10, "clauses": []}).decode()
+
+
+class FakeModel:
+    def __init__(self, name, gemini):
+        self.name = name
+        self.gemini = gemini
+
+    async def generate_content_async(self, prompt):
+        self.gemini.calls.append(self.name)
+        # Yield so concurrent requests interleave while a call is in flight
+        await asyncio.sleep(0.01)
+        if self.name == "gemini-2.5-flash":
+            raise self.gemini.flash_error
+        return SimpleNamespace(text=VALID_ANALYSIS)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Fake Gemini where flash raises `flash_error` and the fallback succeeds."""
+    fake = SimpleNamespace(calls=[], flash_error=ServiceUnavailable("flash is down"))
+    monkeypatch.setattr(ai_engine, "_get_model", lambda name: FakeModel(name, fake))
+    monkeypatch.setitem(ai_engine._flash_breaker, "failures", 0)
+    monkeypatch.setitem(ai_engine._flash_breaker, "open_until", 0.0)
+    ai_engine._analysis_cache.clear()
+    return fake
+
+
+def _analyze(i):
+    # Distinct texts so the response cache never short-circuits the models
+    return ai_engine.analyze_contract_with_ai(f"contract {i}", "General", "Moderate", "Client")
+
+
+def test_breaker_opens_after_repeated_api_errors(gemini):
+    for i in range(ai_engine.FLASH_FAILURE_THRESHOLD):
+        asyncio.run(_analyze(i))
+    gemini.calls.clear()
+
+    result = asyncio.run(_analyze("open"))
+
+    assert result.summary == "ok"
+    assert gemini.calls == ["gemini-1.0-pro"]
+
+
+def test_only_one_request_probes_flash_after_cooldown(gemini):
+    for i in range(ai_engine.FLASH_FAILURE_THRESHOLD):
+        asyncio.run(_analyze(i))
+    # Simulate the cooldown expiring
+    ai_engine._flash_breaker["open_until"] = 0.0
+    gemini.calls.clear()
+
+    async def burst():
+        return await asyncio.gather(*(_analyze(f"burst {i}") for i in range(10)))
+
+    results = asyncio.run(burst())
+
+    assert all(result.summary == "ok" for result in results)
+    assert gemini.calls.count("gemini-2.5-flash") == 1
+    assert ai_engine._flash_breaker["open_until"] > 0.0
+
+
+def test_bad_flash_output_does_not_trip_breaker(gemini):
+    gemini.flash_error = ValueError("No response text returned from model.")
+    for i in range(ai_engine.FLASH_FAILURE_THRESHOLD + 1):
+        asyncio.run(_analyze(i))
+
+    assert ai_engine._flash_breaker["failures"] == 0
+    assert gemini.calls.count("gemini-2.5-flash") == ai_engine.FLASH_FAILURE_THRESHOLD + 1
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from backend.database import ChatMessage, ChatSession
+
+
+def _seed_session(run_db, user_id, timestamps):
+    async def seed(db):
+        session = ChatSession(user_id=user_id, title="Contract chat")
+        db.add(session)
+        await db.flush()
+        for i, created_at in enumerate(timestamps):
+            db.add(ChatMessage(session_id=session.id, role="user", content=str(i), created_at=created_at))
+        return session.id
+    return run_db(seed)
+
+
+def _count_messages(run_db, session_id):
+    async def count(db):
+        result = await db.execute(
+            select(func.count(ChatMessage.id)).where(ChatMessage.session_id == session_id)
+        )
+        return result.scalar()
+    return run_db(count)
+
+
+def test_messages_paginate_across_timestamp_ties(client, run_db, make_user):
+    user_id, headers = make_user("owner@example.com")
+    tied = datetime(2026, 1, 1, 12, 0, 0)
+    timestamps = [datetime(2026, 1, 1, 11, 0, 0)] + [tied] * 5 + [datetime(2026, 1, 1, 13, 0, 0)]
+    session_id = _seed_session(run_db, user_id, timestamps)
+
+    pages = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"/chat-sessions/{session_id}/messages", params=params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["messages"]) <= 2
+        pages.insert(0, [msg["content"] for msg in body["messages"]])
+        if body["next_cursor"] is None:
+            break
+        params = {"limit": 2, **body["next_cursor"]}
+
+    # Every message is returned exactly once, oldest first
+    assert [content for page in pages for content in page] == [str(i) for i in range(7)]
+
+
+def test_messages_cursor_fields_must_be_given_together(client, run_db, make_user):
+    user_id, headers = make_user("owner@example.com")
+    session_id = _seed_session(run_db, user_id, [datetime(2026, 1, 1)])
+
+    for params in ({"before": "2026-01-01T00:00:00"}, {"before_id": 1}):
+        response = client.get(f"/chat-sessions/{session_id}/messages", params=params, headers=headers)
+        assert response.status_code == 400
+
+
+def test_delete_other_users_session_is_404_and_keeps_messages(client, run_db, make_user):
+    owner_id, owner_headers = make_user("owner@example.com")
+    _, other_headers = make_user("other@example.com")
+    session_id = _seed_session(run_db, owner_id, [datetime(2026, 1, 1)] * 3)
+
+    response = client.delete(f"/chat-sessions/{session_id}", headers=other_headers)
+    assert response.status_code == 404
+    assert _count_messages(run_db, session_id) == 3
+
+    response = client.delete(f"/chat-sessions/{session_id}", headers=owner_headers)
+    assert response.status_code == 200
+    assert _count_messages(run_db, session_id) == 0